@@ -2,12 +2,15 @@ from dotenv import load_dotenv
 from pymilvus import MilvusClient, DataType
 import os
 
-from typing import List, Dict, Any
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Dict, Any, Deque, Optional, Tuple
 import hashlib
-import random
 from datetime import datetime, timezone
 
 import click
+import numpy as np
 from tqdm import tqdm
 
 load_dotenv()
@@ -20,50 +23,91 @@ milvus_client = MilvusClient(
 )
 milvus_collection_name = "chunk"
 
-def fake_embedding(text: str, dim: int) -> List[float]:
-    seed = int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:16], 16)
-    rng = random.Random(seed)
-    return [rng.uniform(-1.0, 1.0) for _ in range(dim)]
+# 64-bit LCG (Knuth MMIX constants) used to expand a per-text seed into a vector.
+lcg_multiplier = 6364136223846793005
+lcg_increment = 1442695040888963407
+
+@lru_cache(maxsize=None)
+def _lcg_jump_table(dim: int) -> Tuple[np.ndarray, np.ndarray]:
+    # The LCG state after j + 1 steps from seed s is mul[j] * s + add[j] (mod 2**64),
+    # so every element of every row can be computed independently.
+    mask = (1 << 64) - 1
+    mul = np.empty(dim, dtype=np.uint64)
+    add = np.empty(dim, dtype=np.uint64)
+    m, a = 1, 0
+    for j in range(dim):
+        m = (m * lcg_multiplier) & mask
+        a = (a * lcg_multiplier + lcg_increment) & mask
+        mul[j] = m
+        add[j] = a
+    return mul, add
+
+def fake_embeddings(texts: List[str], dim: int) -> np.ndarray:
+    seeds = np.frombuffer(
+        b"".join(hashlib.blake2b(t.encode("utf-8"), digest_size=8).digest() for t in texts),
+        dtype=">u8",
+    ).astype(np.uint64)
+    mul, add = _lcg_jump_table(dim)
+    # One (N, dim) wrapping uint64 multiply-add instead of a per-row RNG.
+    states = seeds[:, None] * mul + add
+    # Top 24 bits map exactly onto float32's mantissa, giving values in [-1, 1).
+    out = (states >> np.uint64(40)).astype(np.float32)
+    out *= np.float32(2.0 ** -23)
+    out -= np.float32(1)
+    return out
 
 def iter_mock_chunks(
     start_id: int,
     num_docs: int,
     chunks_per_doc: int,
+    embedding_dtype: Any = np.float32,
 ) -> Any:
     now_iso = datetime.now(timezone.utc).isoformat()
     next_id = start_id
     for doc_i in range(num_docs):
         doc_id = f"doc_{doc_i:04d}"
         source = f"mock://{doc_id}"
-        for chunk_i in range(chunks_per_doc):
-            chunk_text = (
-                f"[{doc_id}] chunk={chunk_i} "
-                f"This is a demo text to insert into Milvus."
-                f"source={source} created_at={now_iso}"
-            )
+        prefix = f"[{doc_id}] chunk="
+        suffix = (
+            " This is a demo text to insert into Milvus."
+            f"source={source} created_at={now_iso}"
+        )
+        chunk_texts = [f"{prefix}{chunk_i}{suffix}" for chunk_i in range(chunks_per_doc)]
+        embeddings = fake_embeddings(chunk_texts, embedding_dimensions).astype(embedding_dtype, copy=False)
+        row_ids = range(next_id, next_id + chunks_per_doc)
+        for chunk_i, chunk_text in enumerate(chunk_texts):
             yield {
-                "id": next_id,
+                "id": row_ids[chunk_i],
                 "chunk_text": chunk_text,
-                "embedding": fake_embedding(chunk_text, embedding_dimensions),
+                "embedding": embeddings[chunk_i],
                 "doc_id": doc_id,
                 "chunk_index": chunk_i,
                 "source": source,
                 "created_at": now_iso,
             }
-            next_id += 1
+        next_id += chunks_per_doc
 
-# Define the employee id mapping schema in Milvus
-schema = MilvusClient.create_schema(
-    auto_id=False,
-    enable_dynamic_field=True,
-)
-schema.add_field(field_name="id", datatype=DataType.INT64, is_primary=True)
-schema.add_field(field_name="chunk_text", datatype=DataType.VARCHAR, max_length=65535)
-schema.add_field(field_name="embedding", datatype=DataType.FLOAT_VECTOR, dim=embedding_dimensions)
-schema.add_field(field_name="doc_id", datatype=DataType.VARCHAR, max_length=512)
-schema.add_field(field_name="chunk_index", datatype=DataType.INT64)
-schema.add_field(field_name="source", datatype=DataType.VARCHAR, max_length=2048)
-schema.add_field(field_name="created_at", datatype=DataType.VARCHAR, max_length=64)
+# Embedding storage selectable with --dtype: Milvus vector type and the matching
+# NumPy dtype for generated embeddings. FLOAT16_VECTOR needs Milvus 2.4+.
+vector_dtypes = {
+    "fp32": (DataType.FLOAT_VECTOR, np.float32),
+    "fp16": (DataType.FLOAT16_VECTOR, np.float16),
+}
+
+def build_schema(vector_datatype: DataType):
+    # Define the employee id mapping schema in Milvus
+    schema = MilvusClient.create_schema(
+        auto_id=False,
+        enable_dynamic_field=True,
+    )
+    schema.add_field(field_name="id", datatype=DataType.INT64, is_primary=True)
+    schema.add_field(field_name="chunk_text", datatype=DataType.VARCHAR, max_length=65535)
+    schema.add_field(field_name="embedding", datatype=vector_datatype, dim=embedding_dimensions)
+    schema.add_field(field_name="doc_id", datatype=DataType.VARCHAR, max_length=512)
+    schema.add_field(field_name="chunk_index", datatype=DataType.INT64)
+    schema.add_field(field_name="source", datatype=DataType.VARCHAR, max_length=2048)
+    schema.add_field(field_name="created_at", datatype=DataType.VARCHAR, max_length=64)
+    return schema
 
 index_params = milvus_client.prepare_index_params()
 index_params.add_index(
@@ -72,17 +116,43 @@ index_params.add_index(
 )
 
 
-def ensure_collection(collection_name: str, recreate: bool) -> None:
+def _collection_dtype(collection_name: str) -> str:
+    desc = milvus_client.describe_collection(collection_name)
+    field = next((f for f in (desc.get("fields") or []) if f.get("name") == "embedding"), None)
+    for name, (vector_datatype, _) in vector_dtypes.items():
+        if field is not None and field.get("type") == vector_datatype:
+            return name
+    raise click.ClickException(
+        f"Collection '{collection_name}' has no FLOAT_VECTOR / FLOAT16_VECTOR 'embedding' field"
+    )
+
+
+def ensure_collection(collection_name: str, recreate: bool, dtype: Optional[str] = None) -> str:
+    # Returns the embedding dtype to insert with. An existing collection keeps its
+    # own vector type; an explicit `dtype` that disagrees with it is an error.
     if milvus_client.has_collection(collection_name):
         if recreate:
             milvus_client.drop_collection(collection_name)
         else:
-            return
+            existing = _collection_dtype(collection_name)
+            if dtype is not None and dtype != existing:
+                raise click.ClickException(
+                    f"Collection '{collection_name}' stores {existing} embeddings, not {dtype}; "
+                    "pass --recreate to rebuild it."
+                )
+            return existing
+    dtype = dtype or "fp32"
     milvus_client.create_collection(
         collection_name=collection_name,
-        schema=schema,
+        schema=build_schema(vector_dtypes[dtype][0]),
         index_params=index_params,
     )
+    return dtype
+
+
+def _insert_batch(collection_name: str, batch: List[Dict[str, Any]]) -> int:
+    result = milvus_client.insert(collection_name=collection_name, data=batch)
+    return int(result.get("insert_count", len(batch))) if isinstance(result, dict) else len(batch)
 
 
 def insert_mock_chunks(
@@ -92,31 +162,56 @@ def insert_mock_chunks(
     chunks_per_doc: int = 5,
     batch_size: int = 128,
     recreate: bool = False,
+    concurrency: int = 8,
+    dtype: Optional[str] = None,
 ) -> int:
-    ensure_collection(collection_name, recreate=recreate)
+    dtype = ensure_collection(collection_name, recreate=recreate, dtype=dtype)
     total = num_docs * chunks_per_doc
     inserted_total = 0
     batch: List[Dict[str, Any]] = []
+    # Bounded so generation can run ahead of the inserts without buffering everything.
+    in_flight: Deque[Future] = deque()
+    max_in_flight = concurrency * 2
 
-    for row in tqdm(
-        iter_mock_chunks(
-            start_id=start_id,
-            num_docs=num_docs,
-            chunks_per_doc=chunks_per_doc,
-        ),
+    # Progress is advanced once per completed batch, not per generated row.
+    progress = tqdm(
         total=total,
         desc="Inserting chunks",
-    ):
-        batch.append(row)
-        if len(batch) < batch_size:
-            continue
-        result = milvus_client.insert(collection_name=collection_name, data=batch)
-        inserted_total += int(result.get("insert_count", len(batch))) if isinstance(result, dict) else len(batch)
-        batch = []
-
-    if batch:
-        result = milvus_client.insert(collection_name=collection_name, data=batch)
-        inserted_total += int(result.get("insert_count", len(batch))) if isinstance(result, dict) else len(batch)
+        unit="rows",
+        mininterval=0.5,
+        smoothing=0,
+        miniters=batch_size,
+    )
+    with progress, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        try:
+            for row in iter_mock_chunks(
+                start_id=start_id,
+                num_docs=num_docs,
+                chunks_per_doc=chunks_per_doc,
+                embedding_dtype=vector_dtypes[dtype][1],
+            ):
+                batch.append(row)
+                if len(batch) < batch_size:
+                    continue
+                if len(in_flight) >= max_in_flight:
+                    done = in_flight.popleft().result()
+                    inserted_total += done
+                    progress.update(done)
+                in_flight.append(executor.submit(_insert_batch, collection_name, batch))
+                batch = []
+
+            if batch:
+                in_flight.append(executor.submit(_insert_batch, collection_name, batch))
+
+            while in_flight:
+                done = in_flight.popleft().result()
+                inserted_total += done
+                progress.update(done)
+        except BaseException:
+            # Don't issue the batches still queued behind a failed insert; only
+            # inserts already in progress are waited for.
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
 
     return inserted_total
 
@@ -126,9 +221,26 @@ def insert_mock_chunks(
 @click.option("--start-id", type=int, default=1, show_default=True)
 @click.option("--docs", type=int, default=3, show_default=True)
 @click.option("--chunks-per-doc", type=int, default=5, show_default=True)
-@click.option("--batch-size", type=int, default=128, show_default=True)
+@click.option("--batch-size", type=click.IntRange(min=1), default=128, show_default=True)
+@click.option("--concurrency", type=click.IntRange(min=1), default=8, show_default=True, help="Number of concurrent insert requests.")
+@click.option(
+    "--dtype",
+    type=click.Choice(sorted(vector_dtypes)),
+    default=None,
+    help="Embedding storage type for a new collection (default fp32; fp16 needs Milvus 2.4+). "
+    "An existing collection keeps its type, and a conflicting --dtype is an error.",
+)
 @click.option("--recreate", is_flag=True, help="Drop and recreate collection first.")
-def main(collection: str, start_id: int, docs: int, chunks_per_doc: int, batch_size: int, recreate: bool) -> None:
+def main(
+    collection: str,
+    start_id: int,
+    docs: int,
+    chunks_per_doc: int,
+    batch_size: int,
+    concurrency: int,
+    dtype: Optional[str],
+    recreate: bool,
+) -> None:
     inserted = insert_mock_chunks(
         collection_name=collection,
         start_id=start_id,
@@ -136,6 +248,8 @@ def main(collection: str, start_id: int, docs: int, chunks_per_doc: int, batch_s
         chunks_per_doc=chunks_per_doc,
         batch_size=batch_size,
         recreate=recreate,
+        concurrency=concurrency,
+        dtype=dtype,
     )
     click.echo(f"Inserted {inserted} mock chunks into collection '{collection}'.")
 
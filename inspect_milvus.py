@@ -3,9 +3,15 @@ import os
 from typing import Any, Dict, List, Optional
 
 import click
+import numpy as np
 from dotenv import load_dotenv
 from pymilvus import MilvusClient
 
+try:
+    import orjson
+except ImportError:  # optional, faster JSON encoder
+    orjson = None
+
 
 def _load_env() -> None:
     here = os.path.dirname(os.path.abspath(__file__))
@@ -70,11 +76,14 @@ def _query_sample(
     if not include_embedding:
         return normalized
     for r in normalized:
-        emb = r.get("embedding")
-        if isinstance(emb, list):
+        emb = r.pop("embedding", None)
+        # FLOAT16_VECTOR fields come back as raw half-precision bytes.
+        if isinstance(emb, list) and len(emb) == 1 and isinstance(emb[0], bytes):
+            emb = np.frombuffer(emb[0], dtype=np.float16)
+        if emb is not None:
             r["embedding_dim"] = len(emb)
+            # Works for both lists and ndarrays; only the 5-element slice is converted.
             r["embedding_preview"] = [float(x) for x in emb[:5]]
-            r.pop("embedding", None)
     return normalized
 
 
@@ -100,6 +109,15 @@ def _to_jsonable(value: Any) -> Any:
     return str(value)
 
 
+def _dumps(value: Any) -> str:
+    if orjson is not None:
+        # orjson encodes dicts, lists and numpy natively; `_to_jsonable` only runs
+        # for the odd value it can't handle (bytes, pymilvus objects, ...).
+        option = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        return orjson.dumps(value, default=_to_jsonable, option=option).decode("utf-8")
+    return json.dumps(_to_jsonable(value), ensure_ascii=False, indent=2)
+
+
 @click.command(help="Inspect Milvus collection schema and row count, and optionally print sample rows.")
 @click.option("--collection", default="chunk", show_default=True)
 @click.option("--flush/--no-flush", default=True, show_default=True, help="Flush collection before counting.")
@@ -135,7 +153,7 @@ def main(
             "collection_stats": stats,
             "sample_rows": sample_rows,
         }
-        click.echo(json.dumps(_to_jsonable(payload), ensure_ascii=False, indent=2))
+        click.echo(_dumps(payload))
         return
 
     click.echo(f"Collection: {collection}")
@@ -147,7 +165,7 @@ def main(
     if sample_rows is not None:
         click.echo("")
         click.echo(f"Sample rows (n={len(sample_rows)}):")
-        click.echo(json.dumps(_to_jsonable(sample_rows), ensure_ascii=False, indent=2))
+        click.echo(_dumps(sample_rows))
 
 
 if __name__ == "__main__":
@@ -1,11 +1,17 @@
 import os
-from typing import Any, Dict, List, Optional, Set, Tuple
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
 
 import click
+import numpy as np
 from dotenv import load_dotenv
 from pymilvus import MilvusClient
 from pytidb import TiDBClient
 from pytidb.schema import Field, TableModel, VectorField
+from sqlalchemy import Engine, column, event, insert, table as sa_table, text
 from tqdm import tqdm
 
 
@@ -66,37 +72,130 @@ def _milvus_filter(start: int, end: Optional[int]) -> str:
     return f"id >= {start} && id < {end}"
 
 
-def _coerce_embedding(vec: Any) -> List[float]:
-    if vec is None:
-        return []
-    if isinstance(vec, list):
-        return [float(x) for x in vec]
-    return [float(x) for x in list(vec)]
+def _coerce_embedding(vec: Any) -> np.ndarray:
+    # FLOAT16_VECTOR fields come back from pymilvus as raw half-precision bytes.
+    if isinstance(vec, list) and len(vec) == 1 and isinstance(vec[0], bytes):
+        vec = vec[0]
+    if isinstance(vec, bytes):
+        return np.frombuffer(vec, dtype=np.float16).astype(np.float32)
+    return np.asarray(vec if vec is not None else (), dtype=np.float32)
 
 
-def _fetch_milvus_page(
+def _vector_literal(vec: np.ndarray) -> str:
+    return "[" + ",".join(map(str, vec.tolist())) + "]"
+
+
+def _put(pages: queue.Queue, item: Any, stop: threading.Event) -> None:
+    while not stop.is_set():
+        try:
+            pages.put(item, timeout=0.5)
+            return
+        except queue.Full:
+            continue
+
+
+def _read_pages(
     client: MilvusClient,
     collection: str,
     start: int,
     end: Optional[int],
-    limit: int,
-    offset: int,
-) -> List[Dict[str, Any]]:
-    return client.query(
-        collection_name=collection,
-        filter=_milvus_filter(start, end),
-        output_fields=["id", "chunk_text", "doc_id", "chunk_index", "source", "created_at", "embedding"],
-        limit=limit,
-        offset=offset,
-    )
+    page_size: int,
+    pages: queue.Queue,
+    stop: threading.Event,
+) -> None:
+    # Reader half of the migration pipeline. Always finishes by putting either
+    # `None` (exhausted) or the exception that stopped it.
+    last: Any = None
+    iterator = None
+    try:
+        # Server-side cursor over the range; pages come back in primary key order.
+        iterator = client.query_iterator(
+            collection_name=collection,
+            batch_size=page_size,
+            filter=_milvus_filter(start, end),
+            output_fields=["id", "chunk_text", "doc_id", "chunk_index", "source", "created_at", "embedding"],
+        )
+        while not stop.is_set():
+            page = iterator.next()
+            if not page:
+                break
+            _put(pages, page, stop)
+    except Exception as e:
+        last = e
+    finally:
+        if iterator is not None:
+            iterator.close()
+    _put(pages, last, stop)
 
 
-def _existing_ids_in_tidb(table, ids: List[int]) -> Set[int]:
-    if not ids:
+def _tidb_filter(start: int, end: Optional[int]) -> str:
+    if end is None:
+        return f"id >= {start}"
+    return f"id >= {start} AND id < {end}"
+
+
+def _load_existing_ids(tidb: TiDBClient, table_name: str, start: int, end: Optional[int]) -> np.ndarray:
+    # Loaded once per run as a sorted int64 array (8 bytes/id) so that each page's
+    # re-entrancy check is an in-process binary search instead of a TiDB round trip.
+    # Rows are streamed (server-side cursor) and packed into int64 chunks as they
+    # arrive, so only one chunk of Python row objects is alive at a time.
+    sql = text(f"SELECT id FROM `{table_name}` WHERE {_tidb_filter(start, end)} ORDER BY id")
+    chunks: List[np.ndarray] = []
+    with tidb.db_engine.connect() as conn:
+        result = conn.execution_options(stream_results=True).execute(sql)
+        for part in result.partitions(100_000):
+            chunks.append(np.fromiter((r[0] for r in part), dtype=np.int64, count=len(part)))
+    if not chunks:
+        return np.empty(0, dtype=np.int64)
+    return np.concatenate(chunks)
+
+
+def _raise_warning_limit(engine: Engine) -> None:
+    # SHOW WARNINGS only lists max_error_count entries (64 by default). Raise it
+    # once per pooled connection so a page full of duplicates can't hide other
+    # warnings, without an extra round trip on every write.
+    def _on_connect(dbapi_connection: Any, _record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("SET SESSION max_error_count = 65535")
+        finally:
+            cursor.close()
+
+    event.listen(engine, "connect", _on_connect)
+    # Connections opened before the listener was registered won't have it.
+    engine.dispose()
+
+
+_chunk_columns = ("id", "chunk_text", "doc_id", "chunk_index", "source", "created_at", "embedding")
+
+# MySQL/TiDB error code for a duplicate primary key.
+_ER_DUP_ENTRY = 1062
+
+
+def _insert_ignore(tidb: TiDBClient, table_name: str, rows: List[Dict[str, Any]]) -> int:
+    # One multi-row INSERT IGNORE per page. Ids that already exist (e.g. written
+    # after the id snapshot was loaded) are dropped by TiDB's primary key check.
+    # IGNORE also downgrades every other error (truncation, NULLs, bad vectors)
+    # to a warning, so any warning other than a duplicate key rolls the page back.
+    stmt = insert(sa_table(table_name, *(column(c) for c in _chunk_columns))).prefix_with("IGNORE").values(rows)
+    with tidb.db_engine.begin() as conn:
+        written = int(conn.execute(stmt).rowcount)
+        problems = [w for w in conn.exec_driver_sql("SHOW WARNINGS").fetchall() if int(w[1]) != _ER_DUP_ENTRY]
+        if problems:
+            details = "; ".join(f"{level} {code}: {message}" for level, code, message in problems[:5])
+            raise click.ClickException(
+                f"TiDB rejected or altered {len(problems)} row(s) while writing to `{table_name}`: {details}"
+            )
+    return written
+
+
+def _existing_ids(sorted_ids: np.ndarray, ids: List[int]) -> Set[int]:
+    if not ids or sorted_ids.size == 0:
         return set()
-    ids_sql = ",".join(str(int(i)) for i in ids)
-    rows = table.query(filters=f"id IN ({ids_sql})").to_list()
-    return {int(r["id"]) for r in rows if "id" in r and r["id"] is not None}
+    candidates = np.asarray(ids, dtype=np.int64)
+    pos = np.searchsorted(sorted_ids, candidates)
+    pos[pos == sorted_ids.size] = 0
+    return set(candidates[sorted_ids[pos] == candidates].tolist())
 
 
 def migrate_range(
@@ -107,9 +206,12 @@ def migrate_range(
     page_size: int,
     enable_ssl: bool,
     dry_run: bool,
+    write_concurrency: int = 4,
+    dedup: bool = True,
 ) -> Tuple[int, int, int]:
     milvus = _milvus_client()
     tidb = _tidb_client(enable_ssl=enable_ssl)
+    _raise_warning_limit(tidb.db_engine)
 
     if not milvus.has_collection(milvus_collection):
         raise click.ClickException(f"Milvus collection not found: {milvus_collection}")
@@ -122,71 +224,111 @@ def migrate_range(
 
     Chunk = _make_chunk_model(tidb_table, embedding_dim=embedding_dim)
     # `open_table()` only checks whether the model is mapped, not whether the physical table exists.
-    if not tidb.has_table(tidb_table):
-        table = tidb.create_table(schema=Chunk)
+    if not tidb.has_table(tidb_table) or tidb.open_table(tidb_table) is None:
+        tidb.create_table(schema=Chunk)
+
+    # Without dedup, rows that already exist are still dropped by INSERT IGNORE;
+    # this only skips loading the id snapshot and the per-page lookup.
+    if dedup:
+        existing_ids = _load_existing_ids(tidb, tidb_table, start, end)
     else:
-        table = tidb.open_table(tidb_table)
-        if table is None:
-            table = tidb.create_table(schema=Chunk)
+        existing_ids = np.empty(0, dtype=np.int64)
 
-    offset = 0
     scanned = 0
     skipped = 0
     inserted = 0
 
-    progress = tqdm(desc="Migrating", unit="rows", total=None)
-    try:
-        while True:
-            page = _fetch_milvus_page(
-                client=milvus,
-                collection=milvus_collection,
-                start=start,
-                end=end,
-                limit=page_size,
-                offset=offset,
-            )
-            if not page:
-                break
+    # Milvus reads run in a separate thread so they overlap with TiDB writes;
+    # the bounded queue caps memory at a few pages.
+    pages: queue.Queue = queue.Queue(maxsize=4)
+    stop = threading.Event()
+    reader = threading.Thread(
+        target=_read_pages,
+        kwargs={
+            "client": milvus,
+            "collection": milvus_collection,
+            "start": start,
+            "end": end,
+            "page_size": page_size,
+            "pages": pages,
+            "stop": stop,
+        },
+        name="milvus-reader",
+        daemon=True,
+    )
+
+    # Page writes go to a pool so several INSERTs can be in flight at once; the
+    # deque bounds how many built pages wait on TiDB.
+    writes: Deque[Tuple[int, Future]] = deque()
+    max_pending_writes = write_concurrency * 2
 
-            offset += len(page)
-            scanned += len(page)
-            progress.update(len(page))
-
-            page_ids = [int(r["id"]) for r in page if "id" in r and r["id"] is not None]
-            existing = _existing_ids_in_tidb(table, page_ids)
-
-            to_insert: List[Dict[str, Any]] = []
-            for r in page:
-                rid = r.get("id")
-                if rid is None:
-                    continue
-                rid_int = int(rid)
-                if rid_int in existing:
-                    skipped += 1
-                    continue
-
-                to_insert.append(
-                    {
-                        "id": rid_int,
-                        "chunk_text": r.get("chunk_text", ""),
-                        "doc_id": r.get("doc_id", ""),
-                        "chunk_index": int(r.get("chunk_index", 0) or 0),
-                        "source": r.get("source", ""),
-                        "created_at": r.get("created_at", ""),
-                        "embedding": _coerce_embedding(r.get("embedding")),
-                    }
-                )
-
-            if not to_insert:
-                continue
-
-            if dry_run:
-                inserted += len(to_insert)
-                continue
-
-            table.bulk_insert(to_insert)
-            inserted += len(to_insert)
+    progress = tqdm(desc="Migrating", unit="rows", total=None, mininterval=0.5, smoothing=0)
+    reader.start()
+    try:
+        with ThreadPoolExecutor(max_workers=write_concurrency, thread_name_prefix="tidb-writer") as writers:
+            try:
+                while True:
+                    page = pages.get()
+                    if page is None:
+                        break
+                    if isinstance(page, Exception):
+                        raise page
+
+                    scanned += len(page)
+                    progress.update(len(page))
+
+                    page_ids = [int(r["id"]) for r in page if "id" in r and r["id"] is not None]
+                    existing = _existing_ids(existing_ids, page_ids)
+
+                    to_insert: List[Dict[str, Any]] = []
+                    for r in page:
+                        rid = r.get("id")
+                        if rid is None:
+                            continue
+                        rid_int = int(rid)
+                        if rid_int in existing:
+                            skipped += 1
+                            continue
+
+                        to_insert.append(
+                            {
+                                "id": rid_int,
+                                "chunk_text": r.get("chunk_text", ""),
+                                "doc_id": r.get("doc_id", ""),
+                                "chunk_index": int(r.get("chunk_index", 0) or 0),
+                                "source": r.get("source", ""),
+                                "created_at": r.get("created_at", ""),
+                                "embedding": _vector_literal(_coerce_embedding(r.get("embedding"))),
+                            }
+                        )
+
+                    if not to_insert:
+                        continue
+
+                    if dry_run:
+                        inserted += len(to_insert)
+                        continue
+
+                    if len(writes) >= max_pending_writes:
+                        sent, future = writes.popleft()
+                        written = future.result()
+                        skipped += sent - written
+                        inserted += written
+                    writes.append((len(to_insert), writers.submit(_insert_ignore, tidb, tidb_table, to_insert)))
+
+                while writes:
+                    sent, future = writes.popleft()
+                    written = future.result()
+                    skipped += sent - written
+                    inserted += written
+            except BaseException:
+                # Don't let queued page writes run (and get dropped from the counts)
+                # after a failure; only writes already in progress are waited for.
+                writers.shutdown(wait=False, cancel_futures=True)
+                raise
     finally:
+        stop.set()
+        reader.join()
         progress.close()
 
     return scanned, skipped, inserted
@@ -199,6 +341,21 @@ def migrate_range(
 @click.option("--end", type=int, default=None, help="Exclusive end id; if omitted, reads to the end.")
 @click.option("--page-size", type=int, default=200, show_default=True)
 @click.option("--ssl/--no-ssl", default=True, show_default=False, help="Enable SSL when connecting to TiDB.")
+@click.option(
+    "--write-concurrency",
+    # Each writer holds a connection from the TiDB engine's default SQLAlchemy
+    # pool, which allows at most 15 (pool_size=5 + max_overflow=10).
+    type=click.IntRange(min=1, max=15),
+    default=4,
+    show_default=True,
+    help="Number of concurrent TiDB page writes.",
+)
+@click.option(
+    "--dedup/--no-dedup",
+    default=True,
+    show_default=True,
+    help="Check TiDB for already-migrated ids before inserting. Disable for a fresh range.",
+)
 @click.option("--dry-run", is_flag=True, help="Do not write to TiDB; only simulate inserts.")
 def main(
     milvus_collection: str,
@@ -207,6 +364,8 @@ def main(
     end: Optional[int],
     page_size: int,
     ssl: bool,
+    write_concurrency: int,
+    dedup: bool,
     dry_run: bool,
 ) -> None:
     if end is not None and end < start:
@@ -220,6 +379,8 @@ def main(
         page_size=page_size,
         enable_ssl=ssl,
         dry_run=dry_run,
+        write_concurrency=write_concurrency,
+        dedup=dedup,
     )
     click.echo(
         f"Done. scanned={scanned} skipped_existing={skipped} inserted={inserted} "